@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, Tuple, Optional, Any, List, Union, Iterable
 from urllib.parse import urlencode
@@ -7,10 +8,25 @@ import re
 import requests
 import logging
 import math
+import time
 
 API_BASE = "https://umasearch.notvoid.moe/api/event_by_name"
 HTTP_TIMEOUT = 6.0
 
+# Shared session so repeat lookups reuse the TCP/TLS connection (keep-alive).
+# The adapter pool is sized for a few concurrent lookups against the one
+# API host without dropping connections back out of the pool.
+_SESSION = requests.Session()
+_ADAPTER = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=8)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+# Successful lookups are cached for a while; the same event name is often
+# re-read from the screen several times in a session and each miss costs a
+# full HTTPS round-trip.
+_EVENT_CACHE: Dict[Tuple[Any, ...], Tuple[float, Optional[Dict[str, Any]]]] = {}
+_EVENT_CACHE_TTL = 600.0  # seconds
+
 STAT_CANON = {
     "speed": "Speed",
     "stamina": "Stamina",
@@ -73,6 +89,15 @@ def fetch_event_by_name(
 ) -> Optional[Dict[str, Any]]:
     if not event_name:
         return None
+
+    cache_key = (event_name, global_only, tuple(kinds) if kinds else None, min_score)
+    cached = _EVENT_CACHE.get(cache_key)
+    if cached is not None:
+        ts, payload = cached
+        if time.monotonic() - ts < _EVENT_CACHE_TTL:
+            return payload
+        del _EVENT_CACHE[cache_key]
+
     params: Dict[str, str] = {"event_name": event_name}
     if global_only:
         params["global_only"] = "true"
@@ -82,33 +107,36 @@ def fetch_event_by_name(
         params["min_score"] = str(min_score)
     try:
         url = f"{API_BASE}?{urlencode(params)}"
-        resp = requests.get(url, timeout=HTTP_TIMEOUT)
+        resp = _SESSION.get(url, timeout=HTTP_TIMEOUT)
         resp.raise_for_status()
         data = resp.json()
     except Exception as e:
+        # Transient failures are not cached so the next call retries.
         logging.warning("fetch_event_by_name failed for %r: %s", event_name, e)
         return None
     match = data.get("match")
     if not match or not isinstance(match, dict) or "data" not in match:
-        return None
+        data = None
+    _EVENT_CACHE[cache_key] = (time.monotonic(), data)
     return data
 
-def _flatten_rewards(items: Iterable[Any]) -> List[Any]:
-    """Flatten arbitrarily nested lists/tuples of rewards."""
-    flat: List[Any] = []
-    queue = list(items) if isinstance(items, (list, tuple)) else [items]
-    while queue:
-        x = queue.pop(0)
-        if isinstance(x, (list, tuple)):
-            queue = list(x) + queue
-        else:
-            flat.append(x)
-    return flat
+# Canonical-form cache keyed by the raw name as seen in the payload, seeded
+# with the spellings we expect so the common case is a single dict hit with
+# no lower()/slice allocations. Unseen names are computed once then cached.
+_CANON_CACHE: Dict[str, str] = {}
+for _k, _v in STAT_CANON.items():
+    _CANON_CACHE[_k] = _v
+    _CANON_CACHE[_v] = _v
+    _CANON_CACHE[_k.upper()] = _v
 
 def _canon_stat(name: str) -> str:
     if not name:
         return "Unknown"
-    return STAT_CANON.get(name.lower(), name[:1].upper() + name[1:])
+    hit = _CANON_CACHE.get(name)
+    if hit is None:
+        hit = STAT_CANON.get(name.lower(), name[:1].upper() + name[1:])
+        _CANON_CACHE[name] = hit
+    return hit
 
 def _first_number(val: Any) -> Optional[float]:
     if isinstance(val, (int, float)):
@@ -118,27 +146,44 @@ def _first_number(val: Any) -> Optional[float]:
             if isinstance(x, (int, float)):
                 return float(x)
     if isinstance(val, str):
-        m = re.search(r"-?\d+(\.\d+)?", val)
+        m = _NUM_RX.search(val)
         if m:
             return float(m.group(0))
     return None
 
+_NUM_RX = re.compile(r"-?\d+(?:\.\d+)?")
 HINT_RX = re.compile(r"(?P<name>.+?)\s*(?:hint\s*)?\+?(?P<lvl>-?\d+)", re.IGNORECASE)
 STATUS_RX = re.compile(r"(?:Get|Gain|Apply)\s+(?P<name>.+?)\s+status", re.IGNORECASE)
 CHANCE_RX = re.compile(r"~?\s*(?P<pct>\d{1,3})\s*%")
 
-def _extract_textual_hints_and_statuses(text: str, bucket: List[Dict[str, Any]]):
+# Reward-key spellings, classified via frozenset membership (one hash probe)
+# instead of chained tuple comparisons
+_ENERGY_KEYS = frozenset({"energy", "stamina"})
+_SKILL_POINT_KEYS = frozenset({"skill points", "skill point"})
+
+# Reward kinds as small ints so the scoring loop dispatches on integer
+# equality instead of string comparisons
+_K_STAT = 0
+_K_ENERGY = 1
+_K_SKILL_POINTS = 2
+_K_BOND = 3
+_K_HINT = 4
+_K_STATUS = 5
+_K_TEXT = 6
+_K_UNKNOWN = 7
+
+def _iter_textual_hints_and_statuses(text: str):
     m = HINT_RX.search(text or "")
     if m:
         hint_name = m.group("name").strip().rstrip(":")
         lvl = int(m.group("lvl"))
-        bucket.append({"kind": "hint", "name": hint_name, "value": lvl, "raw": text})
+        yield (_K_HINT, hint_name, lvl, text, None)
     s = STATUS_RX.search(text or "")
     if s:
         status = s.group("name").strip().rstrip(":")
-        bucket.append({"kind": "status", "name": status, "value": None, "raw": text})
+        yield (_K_STATUS, status, None, text, None)
 
-def _norm_rewards(reward_list: List[Any]) -> List[Dict[str, Any]]:
+def _iter_norm_rewards(reward_list: Any):
     """
     Accepts:
       - old shape: {"type":"stat","name":"Speed","value":10}
@@ -147,65 +192,74 @@ def _norm_rewards(reward_list: List[Any]) -> List[Dict[str, Any]]:
           * multi-key dict: {"energy":[10],"speed":[5],"bond":[5]}
       - nested groups: [ [ {...}, {...} ], [ {...} ] ]
       - text markers: {"type":"text","text":"※ Bad result"} or plain strings
-    Returns list of {kind, name, value, raw}
-      kind ∈ {"stat","energy","skill_points","bond","hint","status","text","unknown"}
-    """
-    out: List[Dict[str, Any]] = []
+    Yields compact (kind, name, value, raw, low) tuples in tree order;
+    kind is one of the _K_* integer constants above, and low is the
+    lowercased text for _K_TEXT records (None otherwise) so downstream
+    marker checks don't re-lowercase per pass.
 
-    def push(kind, name=None, value=None, raw=None):
-        out.append({"kind": kind, "name": name, "value": value, "raw": raw})
+    Flattening and normalization happen in one pass so no intermediate
+    flattened list is built.
+    """
+    stack = list(reversed(reward_list)) if isinstance(reward_list, (list, tuple)) else [reward_list]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, (list, tuple)):
+            stack.extend(reversed(item))
+            continue
 
-    for item in _flatten_rewards(reward_list):
         if isinstance(item, dict) and "type" in item:
             t = item.get("type")
             if t == "stat":
                 name = item.get("name")
                 val = item.get("value", 0)
                 val = int(val) if isinstance(val, (int, float)) else 0
-                lname = (name or "").lower()
-                if lname in ("energy", "stamina"):
-                    push("energy", "Energy", val, raw=item)
-                elif lname in ("skill points", "skill point"):
-                    push("skill_points", "Skill points", val, raw=item)
-                elif lname in ("bond",):
-                    push("bond", "Bond", val, raw=item)
+                lname = (name or "").casefold()
+                if lname in _ENERGY_KEYS:
+                    yield (_K_ENERGY, "Energy", val, item, None)
+                elif lname in _SKILL_POINT_KEYS:
+                    yield (_K_SKILL_POINTS, "Skill points", val, item, None)
+                elif lname == "bond":
+                    yield (_K_BOND, "Bond", val, item, None)
                 else:
-                    push("stat", _canon_stat(name or "Unknown"), val, raw=item)
+                    yield (_K_STAT, _canon_stat(name or "Unknown"), val, item, None)
             elif t == "text":
                 txt = str(item.get("text", ""))
-                push("text", None, None, raw=txt)
-                _extract_textual_hints_and_statuses(txt, out)
+                yield (_K_TEXT, None, None, txt, txt.lower())
+                yield from _iter_textual_hints_and_statuses(txt)
             else:
-                push("unknown", None, None, raw=item)
+                yield (_K_UNKNOWN, None, None, item, None)
             continue
 
         if isinstance(item, dict):
             for k, v in item.items():
                 k_str = str(k)
-                k_low = k_str.lower()
+                k_low = k_str.casefold()
                 amt = _first_number(v)
                 if amt is None:
-                    push("unknown", k_str, None, raw={k_str: v})
+                    yield (_K_UNKNOWN, k_str, None, {k_str: v}, None)
                     continue
                 ival = int(amt)
-                if k_low in ("energy", "stamina"):
-                    push("energy", "Energy", ival, raw={k_str: v})
-                elif k_low in ("skill points", "skill point"):
-                    push("skill_points", "Skill points", ival, raw={k_str: v})
+                if k_low in _ENERGY_KEYS:
+                    yield (_K_ENERGY, "Energy", ival, {k_str: v}, None)
+                elif k_low in _SKILL_POINT_KEYS:
+                    yield (_K_SKILL_POINTS, "Skill points", ival, {k_str: v}, None)
                 elif k_low == "bond":
-                    push("bond", "Bond", ival, raw={k_str: v})
+                    yield (_K_BOND, "Bond", ival, {k_str: v}, None)
                 else:
-                    push("stat", _canon_stat(k_str), ival, raw={k_str: v})
+                    yield (_K_STAT, _canon_stat(k_str), ival, {k_str: v}, None)
             continue
 
         if isinstance(item, str):
-            push("text", None, None, raw=item)
-            _extract_textual_hints_and_statuses(item, out)
+            yield (_K_TEXT, None, None, item, item.lower())
+            yield from _iter_textual_hints_and_statuses(item)
             continue
 
-        push("unknown", None, None, raw=item)
+        yield (_K_UNKNOWN, None, None, item, None)
 
-    return out
+# Bound once so _cap_decay skips the SCORING lookup and math attribute
+# fetch per call (read at import; SCORING is not mutated at runtime)
+_CAP_DECAY_STRENGTH = SCORING["cap_decay_strength"]
+_exp = math.exp
 
 def _cap_decay(stat_name: str, add: int, ctx: Context) -> float:
     if not ctx.stat_caps or not ctx.current_stats:
@@ -218,78 +272,123 @@ def _cap_decay(stat_name: str, add: int, ctx: Context) -> float:
     usable = add - over
     if over <= 0:
         return float(add)
-    decay = math.exp(-SCORING["cap_decay_strength"] * over)
+    decay = _exp(-_CAP_DECAY_STRENGTH * over)
     return float(usable) + float(over) * decay
 
-def _score_option(opt_name: str, rewards: List[Any], ctx: Context) -> Tuple[float, List[str]]:
+def _score_option(
+    opt_name: str,
+    rewards: List[Any],
+    ctx: Context,
+    collect_details: bool = True,
+) -> Tuple[float, List[str]]:
     details: List[str] = []
-    norm = _norm_rewards(rewards)
     score = 0.0
 
     prob = 1.0
-    m = CHANCE_RX.search(opt_name)
-    if m:
-        pct = float(m.group("pct"))
-        prob = max(0.0, min(1.0, pct / 100.0))
-
-    has_good = any(r["kind"] == "text" and "good result" in str(r["raw"]).lower() for r in norm)
-    has_bad  = any(r["kind"] == "text" and "bad result"  in str(r["raw"]).lower() for r in norm)
-    if has_good:
-        score += SCORING["good_result_bonus"]
-        details.append(f"+{SCORING['good_result_bonus']:.1f} good-result bonus")
-    if has_bad:
-        penalty = SCORING["bad_result_penalty"]
-        score += penalty
-        details.append(f"{penalty:.1f} bad-result penalty")
-
-    if ctx.hard_avoid_statuses:
-        for r in norm:
-            if r["kind"] == "status" and r["name"] in ctx.hard_avoid_statuses:
-                details.append(f"-999 hard-avoid status: {r['name']}")
-                return (-999.0, details)
-
-    for r in norm:
-        kind, name, val = r["kind"], r.get("name"), r.get("value")
-        ev_mult = prob if prob is not None else SCORING["assume_missing_chance_as"]
-
-        if kind == "energy" and isinstance(val, int):
-            mult = SCORING["energy_point"]
-            if ctx.current_energy is not None and ctx.max_energy is not None:
-                if ctx.current_energy <= ctx.prefer_energy_below:
-                    mult *= ctx.low_energy_multiplier
-                    details.append(f"(energy low bias x{ctx.low_energy_multiplier:.2f})")
-            delta = val * mult * ev_mult
+    # Cheap substring test first; most option names carry no chance marker
+    # and skip the regex entirely.
+    if "%" in opt_name:
+        m = CHANCE_RX.search(opt_name)
+        if m:
+            pct = float(m.group("pct"))
+            prob = max(0.0, min(1.0, pct / 100.0))
+
+    ev_mult = prob if prob is not None else SCORING["assume_missing_chance_as"]
+    hard_avoid = frozenset(ctx.hard_avoid_statuses or ())
+    has_good = False
+    has_bad = False
+
+    # Per-kind multipliers are loop-invariant (the low-energy bias depends
+    # only on ctx), so fold them with ev_mult once: one multiply per reward.
+    energy_low = (
+        ctx.current_energy is not None
+        and ctx.max_energy is not None
+        and ctx.current_energy <= ctx.prefer_energy_below
+    )
+    energy_mult = SCORING["energy_point"] * (ctx.low_energy_multiplier if energy_low else 1.0) * ev_mult
+    skill_mult = SCORING["skill_points_point"] * ev_mult
+    bond_mult = SCORING["bond_point"] * ev_mult
+    stat_weights = SCORING["stat_weights"]
+    default_weight = stat_weights["_default"]
+    neg_stat_mult = SCORING["negative_stat_penalty_mult"]
+    debuff_penalties = SCORING["debuff_penalties"]
+    generic_status_penalty = debuff_penalties["_generic_status"]
+    stat_caps = ctx.stat_caps
+    current_stats = ctx.current_stats
+    have_caps = bool(stat_caps and current_stats)
+
+    # Single pass: score each reward and pick up the good/bad/hard-avoid
+    # signals along the way instead of re-walking the list per signal.
+    for kind, name, val, _raw, low in _iter_norm_rewards(rewards):
+        if kind == _K_TEXT:
+            if "good result" in low:
+                has_good = True
+            if "bad result" in low:
+                has_bad = True
+
+        elif kind == _K_ENERGY and isinstance(val, int):
+            if energy_low and collect_details:
+                details.append(f"(energy low bias x{ctx.low_energy_multiplier:.2f})")
+            delta = val * energy_mult
             score += delta
-            details.append(f"+{delta:.1f} Energy {val:+d}")
+            if collect_details:
+                details.append(f"+{delta:.1f} Energy {val:+d}")
 
-        elif kind == "skill_points" and isinstance(val, int):
-            delta = val * SCORING["skill_points_point"] * ev_mult
+        elif kind == _K_SKILL_POINTS and isinstance(val, int):
+            delta = val * skill_mult
             score += delta
-            details.append(f"+{delta:.1f} Skill points {val:+d}")
+            if collect_details:
+                details.append(f"+{delta:.1f} Skill points {val:+d}")
 
-        elif kind == "bond" and isinstance(val, int):
-            delta = val * SCORING["bond_point"] * ev_mult
+        elif kind == _K_BOND and isinstance(val, int):
+            delta = val * bond_mult
             score += delta
-            details.append(f"+{delta:.1f} Bond {val:+d}")
+            if collect_details:
+                details.append(f"+{delta:.1f} Bond {val:+d}")
 
-        elif kind == "stat" and isinstance(val, int) and name:
-            base = SCORING["stat_weights"].get(name, SCORING["stat_weights"]["_default"])
-            adj = _cap_decay(name, val, ctx)
+        elif kind == _K_STAT and isinstance(val, int) and name:
+            base = stat_weights.get(name, default_weight)
             if val < 0:
-                delta = val * base * SCORING["negative_stat_penalty_mult"] * ev_mult
+                delta = val * base * neg_stat_mult * ev_mult
             else:
+                # Only pay for the decay curve when the gain actually
+                # pushes past the cap; the common uncapped case is a
+                # couple of dict probes.
+                adj = float(val)
+                if have_caps and val > 0:
+                    cap = stat_caps.get(name)
+                    cur = current_stats.get(name)
+                    if cap is not None and cur is not None and cur + val > cap:
+                        adj = _cap_decay(name, val, ctx)
                 delta = adj * base * ev_mult
             score += delta
-            details.append(f"{'+' if delta>=0 else ''}{delta:.1f} {name} {val:+d}")
+            if collect_details:
+                details.append(f"{'+' if delta>=0 else ''}{delta:.1f} {name} {val:+d}")
 
-        elif kind == "status" and name:
-            penalty = SCORING["debuff_penalties"].get(name, SCORING["debuff_penalties"]["_generic_status"])
+        elif kind == _K_STATUS and name:
+            if name in hard_avoid:
+                if collect_details:
+                    details.append(f"-999 hard-avoid status: {name}")
+                return (-999.0, details)
+            penalty = debuff_penalties.get(name, generic_status_penalty)
             score += penalty * ev_mult
-            details.append(f"{penalty:.1f} Status {name}")
+            if collect_details:
+                details.append(f"{penalty:.1f} Status {name}")
+
+    if has_good:
+        score += SCORING["good_result_bonus"]
+        if collect_details:
+            details.append(f"+{SCORING['good_result_bonus']:.1f} good-result bonus")
+    if has_bad:
+        penalty = SCORING["bad_result_penalty"]
+        score += penalty
+        if collect_details:
+            details.append(f"{penalty:.1f} bad-result penalty")
 
     if ctx.avoid_bad_result and has_bad and score > -50:
         score += -2.0
-        details.append("-2.0 extra avoid-bad nudge")
+        if collect_details:
+            details.append("-2.0 extra avoid-bad nudge")
 
     return (score, details)
 
@@ -313,9 +412,15 @@ def get_optimal_choice(event_name: str, ctx: Context = DEFAULT_CONTEXT) -> Tuple
 
     print(f"[DEBUG] Event: {name}")
     scored: List[Tuple[str, float, List[str]]] = []
-    for idx, (opt_name, rewards) in enumerate(options.items(), start=1):
+    best_idx = 0
+    best_score = float("-inf")
+    for idx, (opt_name, rewards) in enumerate(options.items()):
         s, detail = _score_option(opt_name, rewards, ctx)
         scored.append((opt_name, s, detail))
+        # Strict > keeps the first option on ties, matching max() semantics.
+        if s > best_score:
+            best_score = s
+            best_idx = idx
 
     for i, (opt_name, s, detail) in enumerate(scored, start=1):
         print(f"  Option {i}: {opt_name}")
@@ -323,7 +428,6 @@ def get_optimal_choice(event_name: str, ctx: Context = DEFAULT_CONTEXT) -> Tuple
             print(f"    {line}")
         print(f"    => total score: {s:.2f}")
 
-    best_idx = max(range(len(scored)), key=lambda i: scored[i][1]) if scored else 0
     total_choices = len(scored)
     print(f"[DEBUG] Picked choice #{best_idx+1} of {total_choices}")
     return (total_choices, best_idx + 1)
@@ -331,3 +435,18 @@ def get_optimal_choice(event_name: str, ctx: Context = DEFAULT_CONTEXT) -> Tuple
 def get_event_payload(event_name: str) -> Optional[Dict[str, Any]]:
     api = fetch_event_by_name(event_name)
     return api["match"] if api else None
+
+def prefetch_events(event_names: Iterable[str], max_workers: int = 4) -> None:
+    """
+    Warm the event cache for several names at once. Fetches run in parallel
+    on a small thread pool (the shared session's connection pool covers
+    them), so later get_optimal_choice / get_event_payload calls for these
+    names hit the cache instead of the network. Failures are ignored here
+    and simply retried by the eventual real lookup.
+    """
+    names = [n for n in dict.fromkeys(event_names) if n]
+    if not names:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as pool:
+        for _ in pool.map(fetch_event_by_name, names):
+            pass
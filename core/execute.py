@@ -1,19 +1,15 @@
 import pyautogui
 import time
-import json
 
 pyautogui.useImageNotFoundException(False)
 
 from core.state import check_support_card, check_failure, check_turn, check_mood, check_current_year, check_criteria, get_event_name
-from core.logic import do_something
+from core.logic import do_something, config
 from utils.constants import MOOD_LIST
 from core.recognizer import is_infirmary_active, match_template
 from utils.scenario import ura
 from core.events import get_optimal_choice
 
-with open("config.json", "r", encoding="utf-8") as file:
-  config = json.load(file)
-
 MINIMUM_MOOD = config["minimum_mood"]
 PRIORITIZE_G1_RACE = config["prioritize_g1_race"]
 USE_OPTIMAL_EVENT_CHOICES = config["use_optimal_event_choices"]
@@ -2,6 +2,15 @@ import json
 
 from core.state import check_current_year, stat_state, check_energy
 
+# Optional calendar helpers; resolved once at import instead of paying a
+# failed import inside _is_early_or_late_june on every call.
+try:
+  from core.state import current_month, current_week_in_month  # type: ignore[attr-defined]
+except ImportError:
+  current_month = None
+  current_week_in_month = None
+
+# Loaded once at import; other modules can reuse this instead of re-parsing.
 with open("config.json", "r", encoding="utf-8") as file:
   config = json.load(file)
 
@@ -10,9 +19,13 @@ MAX_FAILURE = config["maximum_failure"]
 STAT_CAPS = config["stat_caps"]
 ENERGY_REST_THRESHOLD = config.get("energy_rest_threshold", 30)
 
+# Priority rank per stat, precomputed so lookups are O(1) dict hits
+# instead of a list scan on every training comparison
+PRIORITY_INDEX = {stat: i for i, stat in enumerate(PRIORITY_STAT)}
+
 # Get priority stat from config
 def get_stat_priority(stat_key: str) -> int:
-  return PRIORITY_STAT.index(stat_key) if stat_key in PRIORITY_STAT else 999
+  return PRIORITY_INDEX.get(stat_key, 999)
 
 # Will do train with the most support card
 # Used in the first year (aim for rainbow)
@@ -41,16 +54,16 @@ def most_support_card(results):
     print("\n[INFO] No safe training found. All failure chances are too high.")
     return None
 
-  # Best training
-  best_training = max(
-    filtered_results.items(),
-    key=lambda x: (
-      x[1]["total_support"],
-      -get_stat_priority(x[0])  # priority decides when supports are equal
-    )
-  )
-
-  best_key, best_data = best_training
+  # Best training: single scan over precomputed (support, priority) tuples,
+  # priority decides when supports are equal
+  best_key = None
+  best_data = None
+  best_tup = None
+  for k, v in filtered_results.items():
+    tup = (v["total_support"], -get_stat_priority(k))
+    if best_tup is None or tup > best_tup:
+      best_tup = tup
+      best_key, best_data = k, v
 
   if best_data["total_support"] <= 1:
     if int(best_data["failure"]) == 0:
@@ -79,16 +92,15 @@ def rainbow_training(results):
     print("\n[INFO] No rainbow training found under failure threshold.")
     return None
 
-  # Find support card rainbow in training
-  best_rainbow = max(
-    rainbow_candidates.items(),
-    key=lambda x: (
-      x[1]["support"].get(x[0], 0),
-      -get_stat_priority(x[0])
-    )
-  )
-
-  best_key, best_data = best_rainbow
+  # Find support card rainbow in training (same precomputed-tuple scan)
+  best_key = None
+  best_data = None
+  best_tup = None
+  for stat, data in rainbow_candidates.items():
+    tup = (data["support"].get(stat, 0), -get_stat_priority(stat))
+    if best_tup is None or tup > best_tup:
+      best_tup = tup
+      best_key, best_data = stat, data
   print(f"\n[INFO] Rainbow training selected: {best_key.upper()} with {best_data['support'][best_key]} rainbow supports and {best_data['failure']}% fail chance")
   return best_key
 
@@ -144,25 +156,20 @@ def _normalize_failures_for_low_energy(
 
     return results_training
 
+# Accepted spellings for June ("June"/"Jun"/6/"06"/6.0 after str())
+_JUNE_TOKENS = frozenset({"june", "jun", "6", "06", "6.0"})
+
 def _is_early_or_late_june() -> bool:
+    if current_month is None or current_week_in_month is None:
+        return False
     try:
-        # If you already have something like these in core.state, great:
-        from core.state import current_month, current_week_in_month  # type: ignore[attr-defined]
         month = current_month()        # e.g. "June" or 6
         week = current_week_in_month() # 1..4/5
-        # Normalize month
-        m = str(month).lower()
-        is_june = (m == "june" or m == "jun" or m == "6")
-        if not is_june:
-            # also accept numeric
-            try:
-                is_june = int(month) == 6
-            except Exception:
-                pass
-        if not is_june:
+        if str(month).strip().lower() not in _JUNE_TOKENS:
             return False
-        # "early" (weeks 1–2) or "late" (week 4+)
-        return (1 <= int(week) <= 2) or (int(week) >= 4)
+        # "early" (weeks 1–2) or "late" (week 4+) — i.e. any valid week but 3
+        w = int(week)
+        return w >= 1 and w != 3
     except Exception:
         # If we can't read month/week, stay conservative.
         return False
@@ -190,17 +197,20 @@ def do_something(results):
   print(f"Current stats: {current_stats}")
   print(f"Current energy: {energy}%")
 
-  # Existing low-energy false-scan guard (keeps your behavior)
-  results = _normalize_failures_for_low_energy(
-      results_training=results,
-      current_energy_percent=energy,
-      max_safe_fail=MAX_FAILURE,
-      low_energy_trigger=ENERGY_REST_THRESHOLD,
-      exclude_keys=("wit",)
-  )
-  for k, v in results.items():
-      if v.get("_adjusted_false_scan"):
-          print(f"[DEBUG] Adjusted {k.upper()} fail% to {v['failure']}% (false-scan guard)")
+  # Existing low-energy false-scan guard (keeps your behavior). Only worth
+  # running (and checking for adjustments) when energy is actually low;
+  # above the trigger the normalizer is a guaranteed no-op.
+  if energy is not None and energy <= ENERGY_REST_THRESHOLD:
+    results = _normalize_failures_for_low_energy(
+        results_training=results,
+        current_energy_percent=energy,
+        max_safe_fail=MAX_FAILURE,
+        low_energy_trigger=ENERGY_REST_THRESHOLD,
+        exclude_keys=("wit",)
+    )
+    for k, v in results.items():
+        if v.get("_adjusted_false_scan"):
+            print(f"[DEBUG] Adjusted {k.upper()} fail% to {v['failure']}% (false-scan guard)")
 
   filtered = filter_by_stat_caps(results, current_stats)
 